@@ -0,0 +1,299 @@
+# backend/app/audio_codec.py
+"""
+Binary wire format for the /ws/stream WebSocket.
+
+Every binary message is one frame: a 16 byte little-endian header followed by
+the encoded payload.
+
+    version   uint8   FRAME_VERSION
+    codec     uint8   one of the CODEC_* ids
+    reserved  uint16  must be 0
+    seq       uint32  frame sequence number, wraps at 2**32
+    timestamp uint64  client capture time in milliseconds
+
+The codec is negotiated once per connection: the client sends a JSON text
+message {"type": "hello", "codecs": [...], "sampleRate": 16000} listing the
+codecs it can encode in order of preference and the server answers with
+{"type": "codec", "codec": <name>, "sampleRate": 16000}. A hello with any
+other sample rate is answered with {"type": "error", ...} and the connection
+is closed. Frames in a codec other than the negotiated one are dropped.
+Clients that never send a hello keep streaming raw PCM16 without framing.
+"""
+import struct
+from itertools import accumulate
+from typing import NamedTuple
+
+import numpy as np
+
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<BBHIQ")
+SAMPLE_RATE = 16000
+
+CODEC_PCM16 = 0
+CODEC_MULAW = 1
+CODEC_ALAW = 2
+CODEC_ADPCM = 3
+
+CODEC_IDS = {
+    "pcm16": CODEC_PCM16,
+    "mulaw": CODEC_MULAW,
+    "alaw": CODEC_ALAW,
+    "adpcm": CODEC_ADPCM,
+}
+CODEC_NAMES = {v: k for k, v in CODEC_IDS.items()}
+
+# Server side preference when the client offers several codecs we support
+SERVER_PREFERENCE = ("adpcm", "mulaw", "alaw", "pcm16")
+
+class AudioFrame(NamedTuple):
+    seq: int
+    timestamp_ms: int
+    codec: int
+    samples: np.ndarray  # int16 PCM
+
+def negotiate_codec(offered):
+    """Pick the codec for a connection from the list the client offered"""
+    offered = [str(c).lower() for c in offered or []]
+    for name in SERVER_PREFERENCE:
+        if name in offered:
+            return name
+    return "pcm16"
+
+# --- G.711 lookup tables -----------------------------------------------------
+# Encode tables are indexed by the int16 sample reinterpreted as uint16, decode
+# tables by the 8-bit code, so both directions are a single NumPy take().
+
+_ALL_INT16 = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+_CODES = np.arange(256, dtype=np.int32)
+
+def _build_mulaw_decode():
+    u = ~_CODES & 0xFF
+    t = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+    return np.where(u & 0x80, 0x84 - t, t - 0x84).astype(np.int16)
+
+def _build_mulaw_encode():
+    pcm = _ALL_INT16 >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), 8159) + (0x84 >> 2)
+    seg = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), pcm)
+    uval = np.where(seg >= 8, 0x7F, (seg << 4) | ((pcm >> (np.minimum(seg, 7) + 1)) & 0x0F))
+    return (uval ^ mask).astype(np.uint8)
+
+def _build_alaw_decode():
+    a = _CODES ^ 0x55
+    seg = (a & 0x70) >> 4
+    t = (a & 0x0F) << 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a & 0x80, t, -t).astype(np.int16)
+
+def _build_alaw_encode():
+    pcm = _ALL_INT16 >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), pcm)
+    quant = np.where(seg < 2, pcm >> 1, pcm >> np.minimum(seg, 7)) & 0x0F
+    aval = np.where(seg >= 8, 0x7F, (seg << 4) | quant)
+    return (aval ^ mask).astype(np.uint8)
+
+MULAW_DECODE = _build_mulaw_decode()
+MULAW_ENCODE = _build_mulaw_encode()
+ALAW_DECODE = _build_alaw_decode()
+ALAW_ENCODE = _build_alaw_encode()
+
+# --- IMA ADPCM ---------------------------------------------------------------
+# Each ADPCM payload starts with an 8 byte preamble (initial predictor, step
+# index, pad, sample count) so frames decode independently of each other and a
+# lost frame never corrupts the ones after it. Nibbles are packed low first.
+
+ADPCM_PREAMBLE = struct.Struct("<hBxI")
+
+_ADPCM_INDEX = [-1, -1, -1, -1, 2, 4, 6, 8] * 2
+_ADPCM_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+]
+# Next step index for every (index, code) pair
+_ADPCM_NEXT = [[min(max(i + _ADPCM_INDEX[c], 0), 88) for c in range(16)] for i in range(89)]
+
+def _build_adpcm_diff():
+    step = np.array(_ADPCM_STEPS, dtype=np.int32)[:, None]
+    code = np.arange(16, dtype=np.int32)[None, :]
+    diff = (step >> 3) + np.where(code & 4, step, 0) + np.where(code & 2, step >> 1, 0) + np.where(code & 1, step >> 2, 0)
+    return np.where(code & 8, -diff, diff)
+
+# Signed predictor delta for every (index, code) pair
+ADPCM_DIFF = _build_adpcm_diff()
+
+def adpcm_decode(payload):
+    """Decode one IMA ADPCM payload (preamble + packed nibbles) to int16 PCM"""
+    if len(payload) < ADPCM_PREAMBLE.size:
+        raise ValueError("ADPCM payload shorter than its preamble")
+    predictor, index, count = ADPCM_PREAMBLE.unpack_from(payload)
+    if index > 88:
+        raise ValueError(f"Invalid ADPCM step index: {index}")
+    packed = np.frombuffer(payload, dtype=np.uint8, offset=ADPCM_PREAMBLE.size)
+    if count > packed.size * 2:
+        raise ValueError(f"ADPCM payload too short for {count} samples")
+
+    codes = np.empty(packed.size * 2, dtype=np.uint8)
+    codes[0::2] = packed & 0x0F
+    codes[1::2] = packed >> 4
+    codes = codes[:count]
+
+    # The step index only depends on the codes, so walk it with a table lookup
+    # per code and then resolve all predictor deltas in one vectorized gather.
+    indices = np.fromiter(
+        accumulate(codes.tolist()[:-1], lambda i, c: _ADPCM_NEXT[i][c], initial=index),
+        dtype=np.intp, count=count,
+    ) if count else np.empty(0, dtype=np.intp)
+    diffs = ADPCM_DIFF[indices, codes]
+    samples = predictor + np.cumsum(diffs, dtype=np.int64)
+
+    if samples.size and (samples.min() < -32768 or samples.max() > 32767):
+        # Clipping makes the predictor path dependent; redo it sequentially
+        pred = predictor
+        for n, d in enumerate(diffs.tolist()):
+            pred = min(max(pred + d, -32768), 32767)
+            samples[n] = pred
+    return samples.astype(np.int16)
+
+def adpcm_encode(samples):
+    """Encode int16 PCM as one IMA ADPCM payload (preamble + packed nibbles)"""
+    samples = np.asarray(samples, dtype=np.int16)
+    count = samples.size
+    predictor = int(samples[0]) if count else 0
+    index = 0
+    preamble = ADPCM_PREAMBLE.pack(predictor, index, count)
+
+    codes = bytearray(count + (count & 1))
+    pred = predictor
+    for n, sample in enumerate(samples.tolist()):
+        step = _ADPCM_STEPS[index]
+        diff = sample - pred
+        code = 0
+        if diff < 0:
+            code = 8
+            diff = -diff
+        if diff >= step:
+            code |= 4
+            diff -= step
+        if diff >= step >> 1:
+            code |= 2
+            diff -= step >> 1
+        if diff >= step >> 2:
+            code |= 1
+        pred = min(max(pred + int(ADPCM_DIFF[index, code]), -32768), 32767)
+        index = _ADPCM_NEXT[index][code]
+        codes[n] = code
+
+    packed = np.frombuffer(bytes(codes), dtype=np.uint8)
+    packed = packed[0::2] | (packed[1::2] << 4)
+    return preamble + packed.astype(np.uint8).tobytes()
+
+# --- Frames ------------------------------------------------------------------
+
+def decode_payload(codec, payload):
+    """Decode a frame payload to int16 PCM"""
+    if codec == CODEC_PCM16:
+        if len(payload) % 2:
+            raise ValueError("PCM16 payload has an odd number of bytes")
+        return np.frombuffer(payload, dtype="<i2").astype(np.int16)
+    if codec == CODEC_MULAW:
+        return MULAW_DECODE[np.frombuffer(payload, dtype=np.uint8)]
+    if codec == CODEC_ALAW:
+        return ALAW_DECODE[np.frombuffer(payload, dtype=np.uint8)]
+    if codec == CODEC_ADPCM:
+        return adpcm_decode(payload)
+    raise ValueError(f"Unknown codec id: {codec}")
+
+def encode_payload(codec, samples):
+    """Encode int16 PCM as a frame payload"""
+    samples = np.asarray(samples, dtype=np.int16)
+    if codec == CODEC_PCM16:
+        return samples.astype("<i2").tobytes()
+    if codec == CODEC_MULAW:
+        return MULAW_ENCODE[samples.view(np.uint16)].tobytes()
+    if codec == CODEC_ALAW:
+        return ALAW_ENCODE[samples.view(np.uint16)].tobytes()
+    if codec == CODEC_ADPCM:
+        return adpcm_encode(samples)
+    raise ValueError(f"Unknown codec id: {codec}")
+
+def decode_frame(data, expected_codec=None):
+    """
+    Parse one binary WebSocket message into an AudioFrame.
+    Raises ValueError if expected_codec is given and the frame uses another one.
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError(f"Frame shorter than header ({len(data)} bytes)")
+    version, codec, _reserved, seq, timestamp_ms = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {version}")
+    if expected_codec is not None and codec != expected_codec:
+        raise ValueError(f"Frame codec {codec} does not match negotiated codec {expected_codec}")
+    samples = decode_payload(codec, memoryview(data)[FRAME_HEADER.size:])
+    return AudioFrame(seq, timestamp_ms, codec, samples)
+
+def encode_frame(samples, codec, seq, timestamp_ms):
+    """Build one binary WebSocket message from int16 PCM"""
+    header = FRAME_HEADER.pack(FRAME_VERSION, codec, 0, seq & 0xFFFFFFFF, timestamp_ms)
+    return header + encode_payload(codec, samples)
+
+# --- Sequence tracking -------------------------------------------------------
+
+class SequenceTracker:
+    """Detect gaps, duplicates and late frames from frame sequence numbers"""
+
+    def __init__(self, history=256):
+        self.expected = None
+        self.history = history
+        self.skipped = {}  # Recently skipped sequence numbers, oldest first (insertion ordered)
+        self.received = 0
+        self.missing = 0
+        self.duplicates = 0
+        self.late = 0
+
+    def observe(self, seq):
+        """
+        Record a frame and classify it.
+        Returns "ok", "gap" (frames were skipped before this one), "duplicate"
+        or "late" (a frame that was counted missing arrives after all; it is
+        no longer counted as missing). Duplicate and late frames should be
+        dropped by the caller.
+        """
+        if self.expected is None:
+            self.expected = seq
+        # Signed distance from the expected sequence number, modulo 2**32
+        delta = ((seq - self.expected + 2**31) % 2**32) - 2**31
+        if delta < 0:
+            if self.skipped.pop(seq, None) is not None:
+                self.missing -= 1
+                self.late += 1
+                return "late"
+            # Already received, or skipped longer ago than we remember
+            self.duplicates += 1
+            return "duplicate"
+
+        self.received += 1
+        if delta > 0:
+            self.missing += delta
+            # Only the most recent skips are remembered, so huge jumps stay cheap
+            for n in range(max(delta - self.history, 0), delta):
+                self.skipped[(self.expected + n) % 2**32] = True
+            while len(self.skipped) > self.history:
+                del self.skipped[next(iter(self.skipped))]
+        self.expected = (seq + 1) % 2**32
+        return "gap" if delta > 0 else "ok"
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "missing": self.missing,
+            "duplicates": self.duplicates,
+            "late": self.late,
+        }
@@ -0,0 +1,166 @@
+# backend/app/audio_retention.py
+"""
+Bounded retention of streamed audio for debugging.
+
+Only a sampled fraction of sessions is kept. Each kept session is appended,
+window by window, to a single FLAC file. Bytes are counted as they are
+written, so sessions still being recorded count against the budget too, and
+a session stops being retained once it would exceed its share of it.
+Finished sessions are indexed in close order, so the janitor evicts the
+oldest one in O(1) until the store is back within its byte and age budget.
+The directory is scanned once, when the index is loaded at startup, and
+never on the connection path.
+"""
+import asyncio
+import os
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import soundfile as sf
+
+class AudioRetentionStore:
+    def __init__(self, root, max_bytes=500 * 1024 * 1024, max_age_seconds=3600,
+                 sample_fraction=0.1, max_session_fraction=0.1, samplerate=16000):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.sample_fraction = sample_fraction
+        self.max_session_bytes = max_bytes * max_session_fraction  # One session's share of the budget
+        self.samplerate = samplerate
+        self.index = OrderedDict()  # session_id -> (path, size, closed_at), oldest first
+        self.total_bytes = 0  # Finished sessions plus what open sessions have written so far
+        self._open = {}  # session_id -> [open SoundFile, bytes counted], or None if not retained
+
+    def _path(self, session_id):
+        return os.path.join(self.root, f"session_{session_id}.flac")
+
+    def load_index(self):
+        """Index sessions left on disk by a previous run (one scan at startup)"""
+        os.makedirs(self.root, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and entry.name.startswith("session_") and entry.name.endswith(".flac"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[len("session_"):-len(".flac")], entry.path, stat.st_size))
+        self.index.clear()
+        self.total_bytes = 0
+        for closed_at, session_id, path, size in sorted(found):
+            self.index[session_id] = (path, size, closed_at)
+            self.total_bytes += size
+        print(f"Audio retention index loaded: {len(self.index)} sessions, {self.total_bytes} bytes")
+
+    def is_sampled(self, session_id):
+        """Deterministic per-session sampling decision"""
+        return zlib.crc32(str(session_id).encode()) / 2**32 < self.sample_fraction
+
+    def _fits(self, counted, size):
+        """
+        Whether size more bytes stay within the session's share and the store
+        budget, evicting the oldest finished sessions to make room if needed.
+        """
+        if counted + size > self.max_session_bytes:
+            return False
+        if self.total_bytes + size > self.max_bytes:
+            self.evict(needed=size)
+        return self.total_bytes + size <= self.max_bytes
+
+    def append(self, session_id, pcm_bytes):
+        """
+        Append a window of 16-bit PCM to the session's FLAC file if it is sampled.
+        Older finished sessions are evicted to make room; retention stops for
+        the session only once a window could push it past its share of the
+        budget, or evicting every finished session would not make room.
+        """
+        pcm_bytes = pcm_bytes[:len(pcm_bytes) - len(pcm_bytes) % 2]
+        if session_id not in self._open:
+            # Raw PCM size is an upper bound on what the compressed window adds
+            if not self.is_sampled(session_id) or not self._fits(0, len(pcm_bytes)):
+                self._open[session_id] = None
+            else:
+                if session_id in self.index:
+                    # Reopening truncates the file, so it must leave the eviction index
+                    self.total_bytes -= self.index.pop(session_id)[1]
+                os.makedirs(self.root, exist_ok=True)
+                f = sf.SoundFile(
+                    self._path(session_id), "w", samplerate=self.samplerate,
+                    channels=1, format="FLAC", subtype="PCM_16")
+                self._open[session_id] = [f, 0]
+        entry = self._open[session_id]
+        if entry is None:
+            return False
+        if not self._fits(entry[1], len(pcm_bytes)):
+            print(f"Audio retention budget reached, no longer retaining session {session_id}")
+            self._finish(session_id, entry)
+            self._open[session_id] = None
+            return False
+        samples = np.frombuffer(pcm_bytes, dtype="<i2")
+        if samples.size:
+            entry[0].write(samples)
+            entry[0].flush()
+            self._recount(session_id, entry)
+        return True
+
+    def _recount(self, session_id, entry):
+        """Bring total_bytes in line with the session file's size on disk"""
+        try:
+            size = os.path.getsize(self._path(session_id))
+        except OSError:
+            return
+        self.total_bytes += size - entry[1]
+        entry[1] = size
+
+    def _finish(self, session_id, entry):
+        entry[0].close()
+        self._recount(session_id, entry)
+        path = self._path(session_id)
+        if session_id in self.index:
+            # Same key seen before: replace the old entry rather than double count it
+            self.total_bytes -= self.index[session_id][1]
+        self.index[session_id] = (path, entry[1], time.time())
+        self.index.move_to_end(session_id)
+
+    def end_session(self, session_id):
+        """Close the session's file and add it to the eviction index"""
+        entry = self._open.pop(session_id, None)
+        if entry is None:
+            return
+        self._finish(session_id, entry)
+
+    def evict(self, now=None, needed=0):
+        """
+        Drop the oldest finished sessions until within the age budget and
+        within the byte budget with room for needed more bytes.
+        """
+        now = time.time() if now is None else now
+        evicted = 0
+        while self.index:
+            session_id, (path, size, closed_at) = next(iter(self.index.items()))
+            if self.total_bytes + needed <= self.max_bytes and now - closed_at <= self.max_age_seconds:
+                break
+            self.index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing retained audio {path}: {e}")
+            evicted += 1
+        return evicted
+
+    async def run_janitor(self, interval_seconds=60):
+        """Background task enforcing the retention budget"""
+        while True:
+            try:
+                evicted = self.evict()
+                if evicted:
+                    print(f"Audio retention janitor evicted {evicted} sessions ({self.total_bytes} bytes kept)")
+            except Exception as e:
+                print(f"Error in audio retention janitor: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def close(self):
+        for session_id in list(self._open):
+            self.end_session(session_id)
@@ -5,9 +5,7 @@ from pathlib import Path
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import cross_val_score
 from typing import Tuple, Optional
-import pandas as pd
 
 MODEL_PATH = Path(__file__).parent.parent.parent / "model" / "baseline_model.pkl"
 CONFIDENCE_THRESHOLD = 0.7  # Configure threshold for high-confidence predictions
@@ -23,6 +21,10 @@ def train_baseline(X=None, y=None, csv_path: Optional[str]="data/train.csv", sav
     Returns:
         Tuple of (trained pipeline, metrics dictionary)
     """
+    # Training-only dependencies are imported here so serving never pays for them
+    import pandas as pd
+    from sklearn.model_selection import cross_val_score
+
     if X is None or y is None:
         df = pd.read_csv(csv_path)
         X, y = df['text'].astype(str), df['label'].astype(int)
@@ -58,6 +60,10 @@ def load_model(path=MODEL_PATH):
     with open(path, "rb") as f:
         return pickle.load(f)
 
+def warm_up(pipeline):
+    """Run a dummy prediction so the first real request skips first-call overhead"""
+    return classify_text(pipeline, "warm up")
+
 def classify_text(pipeline, text):
     proba = pipeline.predict_proba([text])[0][1]
     pred = proba >= CONFIDENCE_THRESHOLD  # Use stricter threshold for positive predictions
@@ -1,7 +1,10 @@
 # backend/app/main.py
 import os, tempfile, json, time
+_IMPORT_START = time.perf_counter()  # Used to report module import time in /ready
 import shutil  # for file operations
+import uuid
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, UploadFile, File, BackgroundTasks, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,9 +16,11 @@ class FeedbackModel(BaseModel):
     originalScore: float
     feedback: str
     timestamp: datetime
-from .classifier import load_model, classify_text
-from .transcribe import transcribe_file
+from .classifier import load_model, classify_text, warm_up as warm_up_classifier
+from .transcribe import transcribe_file, load_whisper, WHISPER_MODEL_SIZE, warm_up as warm_up_asr
 from .utils_audio import save_bytes_to_wav
+from .audio_retention import AudioRetentionStore
+from .audio_codec import CODEC_IDS, SAMPLE_RATE, SequenceTracker, decode_frame, negotiate_codec
 
 def ensure_file_exists(file_path: str, timeout: int = 5):
     """Wait for file to be fully written and accessible"""
@@ -55,28 +60,95 @@ def cleanup_old_files(directory: str, max_age_seconds: int = 3600):
 # Set up directories
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 AUDIO_CACHE_DIR = os.path.join(APP_ROOT, "data", "audio_cache")
+AUDIO_RETENTION_DIR = os.path.join(APP_ROOT, "data", "audio_retention")
 MODEL_DIR = os.path.join(APP_ROOT, "..", "..", "model")
 FEEDBACK_DIR = os.path.join(APP_ROOT, "data", "feedback")
 BASE_DATA_PATH = os.path.join(APP_ROOT, "..", "..", "data", "train.csv")
 
-# Initialize model training service
-from .model_training import ModelTrainingService
-training_service = ModelTrainingService(FEEDBACK_DIR, MODEL_DIR, BASE_DATA_PATH)
+# Models are always preloaded at startup; set STARTUP_WARMUP=0 to skip the
+# dummy inferences that follow (e.g. for quick local reloads)
+STARTUP_WARMUP = os.environ.get("STARTUP_WARMUP", "1") != "0"
 
-# Ensure the audio cache directory exists and is writable
-try:
-    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
-    # Test if directory is writable
-    test_file = os.path.join(AUDIO_CACHE_DIR, "test.tmp")
-    with open(test_file, "w") as f:
-        f.write("test")
-    os.remove(test_file)
-    print(f"Audio cache directory ready at: {AUDIO_CACHE_DIR}")
-except Exception as e:
-    print(f"Error setting up audio cache directory: {e}")
-    raise
+# Working WAVs only live while a window is transcribed; older ones were left by a crash
+AUDIO_CACHE_STALE_SECONDS = 60
 
-app = FastAPI()
+# Retained debugging audio: byte and age budget, fraction of sessions kept,
+# one session's share of the byte budget, janitor period
+retention = AudioRetentionStore(
+    AUDIO_RETENTION_DIR,
+    max_bytes=int(os.environ.get("AUDIO_RETENTION_MAX_BYTES", 500 * 1024 * 1024)),
+    max_age_seconds=float(os.environ.get("AUDIO_RETENTION_MAX_AGE", 3600)),
+    sample_fraction=float(os.environ.get("AUDIO_RETENTION_FRACTION", 0.1)),
+    max_session_fraction=float(os.environ.get("AUDIO_RETENTION_SESSION_FRACTION", 0.1)),
+)
+AUDIO_RETENTION_JANITOR_INTERVAL = float(os.environ.get("AUDIO_RETENTION_JANITOR_INTERVAL", 60))
+
+def retain_audio(session_id, pcm_bytes):
+    """Keep a window of session audio for debugging; never fails the pipeline"""
+    try:
+        retention.append(session_id, pcm_bytes)
+    except Exception as e:
+        print(f"Error retaining audio for session {session_id}: {e}")
+
+# Model training service is created lazily; it pulls in pandas and sklearn model selection
+training_service = None
+
+def get_training_service():
+    global training_service
+    if training_service is None:
+        from .model_training import ModelTrainingService
+        training_service = ModelTrainingService(FEEDBACK_DIR, MODEL_DIR, BASE_DATA_PATH)
+    return training_service
+
+def prepare_audio_cache_dir():
+    """Ensure the audio cache directory exists, is writable and has no stale files"""
+    try:
+        os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+        # Test if directory is writable
+        test_file = os.path.join(AUDIO_CACHE_DIR, "test.tmp")
+        with open(test_file, "w") as f:
+            f.write("test")
+        os.remove(test_file)
+        # One scan at startup for working files (and .backup copies) left by an earlier run
+        cleanup_old_files(AUDIO_CACHE_DIR, max_age_seconds=AUDIO_CACHE_STALE_SECONDS)
+        print(f"Audio cache directory ready at: {AUDIO_CACHE_DIR}")
+    except Exception as e:
+        print(f"Error setting up audio cache directory: {e}")
+        raise
+
+MODEL = None
+
+# Startup phase timings in seconds, reported by /ready
+STARTUP_PHASES = {}
+READY = False
+
+def _timed_phase(name, fn):
+    start = time.perf_counter()
+    result = fn()
+    STARTUP_PHASES[name] = round(time.perf_counter() - start, 4)
+    print(f"Startup phase '{name}' took {STARTUP_PHASES[name]:.3f}s")
+    return result
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm models before the worker starts accepting requests"""
+    global MODEL, READY
+    STARTUP_PHASES["imports"] = round(time.perf_counter() - _IMPORT_START, 4)
+    _timed_phase("audio_cache", prepare_audio_cache_dir)
+    _timed_phase("retention_index", retention.load_index)
+    MODEL = _timed_phase("classifier_load", load_model)
+    _timed_phase("asr_load", lambda: load_whisper(WHISPER_MODEL_SIZE))
+    if STARTUP_WARMUP:
+        _timed_phase("classifier_warmup", lambda: warm_up_classifier(MODEL))
+        _timed_phase("asr_warmup", warm_up_asr)
+    janitor = asyncio.create_task(retention.run_janitor(AUDIO_RETENTION_JANITOR_INTERVAL))
+    READY = True
+    yield
+    READY = False
+    janitor.cancel()
+    retention.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -87,13 +159,28 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-MODEL = load_model()
+@app.get("/ready")
+async def ready():
+    """
+    Report startup phase timings. Uvicorn only serves requests once the lifespan
+    startup has finished, so this is not a gate during startup; it returns 503
+    during shutdown or if the classifier is not loaded.
+    """
+    ok = READY and MODEL is not None
+    body = {
+        "ready": ok,
+        "warmup": STARTUP_WARMUP,
+        "phases": STARTUP_PHASES,
+        "total_seconds": round(sum(STARTUP_PHASES.values()), 4)
+    }
+    return JSONResponse(content=body, status_code=200 if ok else 503)
 
 async def check_and_retrain_model():
     """Background task to check if model needs retraining"""
-    if training_service.should_retrain():
+    service = get_training_service()
+    if service.should_retrain():
         print("Starting model retraining...")
-        success = training_service.retrain_model()
+        success = service.retrain_model()
         if success:
             # Reload the model
             global MODEL
@@ -154,17 +241,34 @@ async def websocket_stream(websocket: WebSocket):
     buf = bytearray()
     CHUNK_BYTES = 16000 * 2 * 5  # 5s worth of 16kHz 16-bit samples
     session_id = str(int(time.time() * 1000))  # Create unique session ID
-    
-    # Clean up old files before starting
-    cleanup_old_files(AUDIO_CACHE_DIR)
+    retention_key = uuid.uuid4().hex  # Collision-free key for retained audio
+    codec = None  # Negotiated wire codec; None means legacy raw PCM16
+    sequence = SequenceTracker()
+    rejected_frames = 0  # Malformed frames or frames not in the negotiated codec
     
     try:
         while True:
             msg = await websocket.receive()
             if "bytes" in msg:
-                buf.extend(msg["bytes"])
+                if codec is None:
+                    buf.extend(msg["bytes"])
+                else:
+                    try:
+                        frame = decode_frame(msg["bytes"], expected_codec=codec)
+                    except ValueError as e:
+                        rejected_frames += 1
+                        print(f"Dropping audio frame: {e}")
+                        continue
+                    status = sequence.observe(frame.seq)
+                    if status in ("duplicate", "late"):
+                        print(f"Dropping {status} frame {frame.seq}")
+                        continue
+                    if status == "gap":
+                        print(f"Frame gap before {frame.seq}: {sequence.stats()}")
+                    buf.extend(frame.samples.tobytes())
                 if len(buf) >= CHUNK_BYTES:
-                    # Create a WAV file in our audio cache directory
+                    retain_audio(retention_key, bytes(buf))
+                    # Create a working WAV file in our audio cache directory
                     timestamp = int(time.time() * 1000)
                     filename = f"audio_{session_id}_{timestamp}.wav"
                     tmp_path = os.path.join(AUDIO_CACHE_DIR, filename)
@@ -239,11 +343,40 @@ async def websocket_stream(websocket: WebSocket):
                         except Exception as e:
                             print(f"Error cleaning up backup file: {e}")
                         
-                        print(f"Audio file remains at: {tmp_path} for debugging")
+                        try:
+                            if os.path.exists(tmp_path):
+                                os.remove(tmp_path)
+                        except Exception as e:
+                            print(f"Error cleaning up audio file: {e}")
             elif "text" in msg:
                 txt = msg["text"]
+                if txt.startswith("{"):
+                    # Codec negotiation: {"type": "hello", "codecs": [...], "sampleRate": 16000}
+                    try:
+                        hello = json.loads(txt)
+                    except ValueError:
+                        hello = None
+                    if isinstance(hello, dict) and hello.get("type") == "hello":
+                        if hello.get("sampleRate", SAMPLE_RATE) != SAMPLE_RATE:
+                            await websocket.send_text(json.dumps({
+                                "type": "error",
+                                "error": f"Unsupported sample rate {hello.get('sampleRate')}, expected {SAMPLE_RATE}",
+                                "sampleRate": SAMPLE_RATE
+                            }))
+                            await websocket.close(code=1003)
+                            return
+                        name = negotiate_codec(hello.get("codecs"))
+                        codec = CODEC_IDS[name]
+                        print(f"Session {session_id} negotiated codec: {name}")
+                        await websocket.send_text(json.dumps({
+                            "type": "codec",
+                            "codec": name,
+                            "sampleRate": SAMPLE_RATE
+                        }))
+                        continue
                 if txt == "__END__":
                     if buf:
+                        retain_audio(retention_key, bytes(buf))
                         # Use the same audio cache directory for final buffer
                         timestamp = int(time.time() * 1000)
                         filename = f"audio_{session_id}_final_{timestamp}.wav"
@@ -299,12 +432,17 @@ async def websocket_stream(websocket: WebSocket):
                             except Exception as e:
                                 print(f"Error cleaning up backup file: {e}")
                             
-                            print(f"Final audio file remains at: {tmp_path} for debugging")
+                            try:
+                                if os.path.exists(tmp_path):
+                                    os.remove(tmp_path)
+                            except Exception as e:
+                                print(f"Error cleaning up audio file: {e}")
                     
                     # Send final status
                     await websocket.send_text(json.dumps({
                         "status": "ended",
-                        "message": "Recording stopped successfully"
+                        "message": "Recording stopped successfully",
+                        "frames": {**sequence.stats(), "rejected": rejected_frames}
                     }))
                     await websocket.close()
                     return
@@ -317,4 +455,6 @@ async def websocket_stream(websocket: WebSocket):
             await websocket.close()
         except:
             pass
-        print("WebSocket error:", e)
\ No newline at end of file
+        print("WebSocket error:", e)
+    finally:
+        retention.end_session(retention_key)
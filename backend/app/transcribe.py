@@ -2,6 +2,7 @@
 import os
 import whisper
 _model = None
+WHISPER_MODEL_SIZE = "tiny"  # Using tiny for faster demo
 
 def load_whisper(model_size="small"):
     global _model
@@ -9,6 +10,14 @@ def load_whisper(model_size="small"):
         _model = whisper.load_model(model_size)
     return _model
 
+def warm_up(seconds=1.0, samplerate=16000):
+    """Load Whisper and run a dummy inference on silence so the first call is warm"""
+    import numpy as np
+
+    m = load_whisper(WHISPER_MODEL_SIZE)
+    m.transcribe(np.zeros(int(seconds * samplerate), dtype=np.float32))
+    return m
+
 def verify_file_access(file_path, max_retries=5, delay=0.5):
     """Verify file exists and is accessible for reading"""
     import time
@@ -74,7 +83,7 @@ def load_audio(file_path):
 def transcribe_file(path, language=None):
     try:
         print(f"Loading Whisper model for transcription...")
-        m = load_whisper("tiny")  # Using tiny for faster demo
+        m = load_whisper(WHISPER_MODEL_SIZE)
         
         print(f"Loading audio data from: {path}")
         # Load audio data directly instead of letting Whisper load it
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Tests import the backend package the same way uvicorn does (app.main)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,161 @@
+# backend/tests/test_audio_codec.py
+import hashlib
+import warnings
+
+import numpy as np
+import pytest
+
+from app.audio_codec import (
+    ADPCM_DIFF, ADPCM_PREAMBLE, ALAW_DECODE, ALAW_ENCODE, CODEC_ADPCM, CODEC_ALAW,
+    CODEC_IDS, CODEC_MULAW, CODEC_PCM16, FRAME_HEADER, MULAW_DECODE, MULAW_ENCODE,
+    SequenceTracker, adpcm_decode, adpcm_encode, decode_frame, encode_frame,
+)
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop  # Removed in Python 3.13
+    except ImportError:
+        audioop = None
+
+ALL_INT16 = np.arange(-32768, 32768, dtype=np.int16)
+
+# SHA-256 of each table as little-endian bytes; any edit to the tables changes the wire format
+TABLE_DIGESTS = {
+    "MULAW_ENCODE": (MULAW_ENCODE, "617fa4850d68d3906597e949f7625fb2fc46db479e29707f33159b3d131721cb"),
+    "MULAW_DECODE": (MULAW_DECODE, "3dab54339e520bb2c924826e3b72a917a2b612e9fd12fc867500f1d983a75827"),
+    "ALAW_ENCODE": (ALAW_ENCODE, "f77c76aa923ee25617453f87514828a12896227f82ff383bf3bb53d6ac7c2a0f"),
+    "ALAW_DECODE": (ALAW_DECODE, "e04788d110e58ff8c70c93b8480190d973e3b67876b6119abbaec766cc75c174"),
+}
+
+def speech_like(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    signal = np.sin(t / 7) * 12000 + rng.normal(0, 2000, n)
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def adpcm_reference_decode(payload):
+    """
+    Plain sequential IMA ADPCM decode, clamping the predictor at every step.
+    Returns the samples and whether any step actually had to be clamped.
+    """
+    predictor, index, count = ADPCM_PREAMBLE.unpack_from(payload)
+    packed = payload[ADPCM_PREAMBLE.size:]
+    out = []
+    clamped = False
+    for n in range(count):
+        code = packed[n >> 1] >> 4 if n & 1 else packed[n >> 1] & 0x0F
+        unclamped = predictor + int(ADPCM_DIFF[index, code])
+        predictor = min(max(unclamped, -32768), 32767)
+        clamped = clamped or predictor != unclamped
+        index = min(max(index + [-1, -1, -1, -1, 2, 4, 6, 8][code & 7], 0), 88)
+        out.append(predictor)
+    return np.array(out, dtype=np.int16), clamped
+
+@pytest.mark.parametrize("name", sorted(TABLE_DIGESTS))
+def test_g711_table_digests(name):
+    table, digest = TABLE_DIGESTS[name]
+    data = table.astype(table.dtype.newbyteorder("<")).tobytes()
+    assert hashlib.sha256(data).hexdigest() == digest
+
+def test_g711_fixed_vectors():
+    samples = np.array([0, 1, -1, 100, -100, 1000, -1000, 32767, -32768], dtype=np.int16)
+    assert MULAW_ENCODE[samples.view(np.uint16)].tolist() == [255, 255, 126, 242, 114, 206, 78, 128, 0]
+    assert ALAW_ENCODE[samples.view(np.uint16)].tolist() == [213, 213, 85, 211, 83, 250, 122, 170, 42]
+    assert MULAW_DECODE[[0x00, 0x7F, 0x80, 0xFF]].tolist() == [-32124, 0, 32124, 0]
+    assert ALAW_DECODE[[0x00, 0x55, 0x80, 0xD5]].tolist() == [-5504, -8, 5504, 8]
+
+@pytest.mark.skipif(audioop is None, reason="audioop not available")
+def test_g711_tables_match_audioop():
+    pcm = ALL_INT16.tobytes()
+    codes = bytes(range(256))
+    assert np.array_equal(np.frombuffer(audioop.lin2ulaw(pcm, 2), np.uint8), MULAW_ENCODE[ALL_INT16.view(np.uint16)])
+    assert np.array_equal(np.frombuffer(audioop.lin2alaw(pcm, 2), np.uint8), ALAW_ENCODE[ALL_INT16.view(np.uint16)])
+    assert np.array_equal(np.frombuffer(audioop.ulaw2lin(codes, 2), np.int16), MULAW_DECODE)
+    assert np.array_equal(np.frombuffer(audioop.alaw2lin(codes, 2), np.int16), ALAW_DECODE)
+
+def test_adpcm_fast_path_matches_reference():
+    payload = adpcm_encode(speech_like(4001))
+    reference, clamped = adpcm_reference_decode(payload)
+    assert not clamped
+    decoded = adpcm_decode(payload)
+    assert decoded.size == 4001
+    assert np.array_equal(decoded, reference)
+
+def test_adpcm_clipping_path_matches_reference():
+    # Full-scale square wave overshoots the int16 range and forces the sequential path
+    samples = np.repeat(np.tile(np.array([32767, -32768], dtype=np.int16), 20), 50)
+    payload = adpcm_encode(samples)
+    reference, clamped = adpcm_reference_decode(payload)
+    assert clamped
+    decoded = adpcm_decode(payload)
+    assert decoded.min() == -32768 and decoded.max() == 32767
+    assert np.array_equal(decoded, reference)
+
+@pytest.mark.skipif(audioop is None, reason="audioop not available")
+def test_adpcm_matches_audioop():
+    samples = speech_like(2000)
+    payload = adpcm_encode(samples)
+    packed = np.frombuffer(payload, np.uint8, offset=ADPCM_PREAMBLE.size)
+    swapped = ((packed << 4) | (packed >> 4)).astype(np.uint8).tobytes()  # audioop packs high nibble first
+    reference, _ = audioop.adpcm2lin(swapped, 2, (int(samples[0]), 0))
+    assert np.array_equal(adpcm_decode(payload), np.frombuffer(reference, np.int16))
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3, 17001])
+@pytest.mark.parametrize("codec", sorted(CODEC_IDS.values()))
+def test_frame_round_trip_odd_counts(codec, count):
+    samples = speech_like(count, seed=count)
+    frame = decode_frame(encode_frame(samples, codec, 5, 1700000000000))
+    assert frame.samples.dtype == np.int16 and frame.samples.size == count
+    if codec == CODEC_PCM16:
+        assert np.array_equal(frame.samples, samples)
+    elif codec in (CODEC_MULAW, CODEC_ALAW):
+        table = MULAW_DECODE if codec == CODEC_MULAW else ALAW_DECODE
+        encode = MULAW_ENCODE if codec == CODEC_MULAW else ALAW_ENCODE
+        assert np.array_equal(frame.samples, table[encode[samples.view(np.uint16)]])
+
+def test_adpcm_payload_length_for_odd_count():
+    assert len(adpcm_encode(np.zeros(3, dtype=np.int16))) == ADPCM_PREAMBLE.size + 2
+    assert adpcm_decode(adpcm_encode(np.array([5], dtype=np.int16))).tolist() == [5]
+
+def test_frame_header_parse():
+    data = encode_frame(np.zeros(4, dtype=np.int16), CODEC_MULAW, 2**32 + 7, 1700000000123)
+    assert len(data) == FRAME_HEADER.size + 4
+    assert data[:2] == bytes([1, CODEC_MULAW])
+    frame = decode_frame(data)
+    assert (frame.seq, frame.timestamp_ms, frame.codec) == (7, 1700000000123, CODEC_MULAW)
+
+@pytest.mark.parametrize("data, message", [
+    (b"\x01\x01", "shorter than header"),
+    (FRAME_HEADER.pack(2, CODEC_PCM16, 0, 0, 0), "Unsupported frame version"),
+    (FRAME_HEADER.pack(1, 9, 0, 0, 0), "Unknown codec"),
+    (FRAME_HEADER.pack(1, CODEC_PCM16, 0, 0, 0) + b"\x00", "odd number of bytes"),
+    (FRAME_HEADER.pack(1, CODEC_ADPCM, 0, 0, 0) + ADPCM_PREAMBLE.pack(0, 0, 9) + b"\x00", "too short"),
+])
+def test_malformed_frames(data, message):
+    with pytest.raises(ValueError, match=message):
+        decode_frame(data)
+
+def test_codec_mismatch_rejected():
+    data = encode_frame(np.zeros(4, dtype=np.int16), CODEC_ALAW, 0, 0)
+    assert decode_frame(data, expected_codec=CODEC_ALAW).codec == CODEC_ALAW
+    with pytest.raises(ValueError, match="does not match negotiated codec"):
+        decode_frame(data, expected_codec=CODEC_ADPCM)
+
+def test_sequence_tracker_reordering_and_duplicates():
+    tracker = SequenceTracker()
+    assert [tracker.observe(s) for s in (0, 1, 4)] == ["ok", "ok", "gap"]
+    assert tracker.stats()["missing"] == 2
+    assert tracker.observe(2) == "late"
+    assert tracker.observe(2) == "duplicate"
+    assert tracker.observe(1) == "duplicate"
+    assert tracker.stats() == {"received": 3, "missing": 1, "duplicates": 2, "late": 1}
+
+def test_sequence_tracker_wraparound_and_history():
+    tracker = SequenceTracker(history=4)
+    assert [tracker.observe(s) for s in (2**32 - 1, 0, 10)] == ["ok", "ok", "gap"]
+    assert tracker.stats()["missing"] == 9
+    # Only the last 4 skipped numbers are remembered; older ones count as duplicates
+    assert tracker.observe(9) == "late"
+    assert tracker.observe(1) == "duplicate"
+    assert tracker.stats() == {"received": 3, "missing": 8, "duplicates": 1, "late": 1}
@@ -0,0 +1,59 @@
+# backend/tests/test_audio_retention.py
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("soundfile")
+
+from app.audio_retention import AudioRetentionStore
+
+WINDOW_BYTES = 80000 * 2  # 5s of 16 kHz 16-bit audio
+
+def window(seed):
+    # Noise barely compresses, so each window costs close to its raw size
+    return np.random.default_rng(seed).normal(0, 3000, WINDOW_BYTES // 2).astype(np.int16).tobytes()
+
+def disk_bytes(root):
+    return sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+
+def test_full_store_evicts_oldest_sessions_for_new_ones(tmp_path):
+    store = AudioRetentionStore(str(tmp_path), max_bytes=2 * 1024 * 1024,
+                                sample_fraction=1.0, max_session_fraction=1.0)
+    store.load_index()
+    for n in range(6):
+        for w in range(4):
+            assert store.append(f"s{n}", window(n * 4 + w))
+        store.end_session(f"s{n}")
+    assert list(store.index)[-1] == "s5"
+    assert "s0" not in store.index
+    assert store.total_bytes == disk_bytes(tmp_path) <= store.max_bytes
+
+def test_open_session_evicts_finished_sessions_mid_call(tmp_path):
+    store = AudioRetentionStore(str(tmp_path), max_bytes=3 * WINDOW_BYTES,
+                                sample_fraction=1.0, max_session_fraction=1.0)
+    for w in range(2):
+        store.append("old", window(w))
+    store.end_session("old")
+    # The new session grows into the space the finished one used
+    assert all(store.append("new", window(10 + w)) for w in range(3))
+    assert "old" not in store.index
+    assert store.total_bytes == disk_bytes(tmp_path) <= store.max_bytes
+
+def test_session_stops_at_its_share(tmp_path):
+    store = AudioRetentionStore(str(tmp_path), max_bytes=10 * WINDOW_BYTES,
+                                sample_fraction=1.0, max_session_fraction=0.25)
+    assert [store.append("a", window(w)) for w in range(4)] == [True, True, False, False]
+    store.end_session("a")
+    assert list(store.index) == ["a"]
+    assert store.total_bytes == disk_bytes(tmp_path)
+
+def test_reused_key_replaces_index_entry(tmp_path):
+    store = AudioRetentionStore(str(tmp_path), sample_fraction=1.0, max_session_fraction=1.0)
+    for w in range(3):
+        store.append("x", window(w))
+    store.end_session("x")
+    store.append("x", window(3))
+    store.end_session("x")
+    assert list(store.index) == ["x"]
+    assert store.total_bytes == disk_bytes(tmp_path)
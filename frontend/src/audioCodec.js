@@ -0,0 +1,157 @@
+// frontend/src/audioCodec.js
+// Encoder side of the /ws/stream wire format (see backend/app/audio_codec.py).
+// Every binary message is a 16 byte little-endian header followed by the payload:
+// version u8, codec u8, reserved u16, seq u32, timestamp ms u64.
+
+export const FRAME_VERSION = 1;
+export const HEADER_BYTES = 16;
+
+export const CODECS = {
+  pcm16: 0,
+  mulaw: 1,
+  alaw: 2,
+  adpcm: 3,
+};
+
+// Codecs this client can encode, most compact first
+export const SUPPORTED_CODECS = ['adpcm', 'mulaw', 'alaw', 'pcm16'];
+
+const ULAW_SEG_END = [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF];
+const ALAW_SEG_END = [0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF];
+
+const segment = (value, table) => {
+  for (let i = 0; i < table.length; i++) {
+    if (value <= table[i]) return i;
+  }
+  return table.length;
+};
+
+const linearToMulaw = (sample) => {
+  let pcm = sample >> 2;
+  let mask = 0xFF;
+  if (pcm < 0) {
+    pcm = -pcm;
+    mask = 0x7F;
+  }
+  pcm = Math.min(pcm, 8159) + (0x84 >> 2);
+  const seg = segment(pcm, ULAW_SEG_END);
+  if (seg >= 8) return 0x7F ^ mask;
+  return ((seg << 4) | ((pcm >> (seg + 1)) & 0x0F)) ^ mask;
+};
+
+const linearToAlaw = (sample) => {
+  let pcm = sample >> 3;
+  let mask = 0xD5;
+  if (pcm < 0) {
+    mask = 0x55;
+    pcm = -pcm - 1;
+  }
+  const seg = segment(pcm, ALAW_SEG_END);
+  if (seg >= 8) return 0x7F ^ mask;
+  const quant = (seg < 2 ? pcm >> 1 : pcm >> seg) & 0x0F;
+  return ((seg << 4) | quant) ^ mask;
+};
+
+// G.711 encoders as 64K lookup tables indexed by the sample as uint16
+const buildTable = (encode) => {
+  const table = new Uint8Array(65536);
+  for (let i = 0; i < 65536; i++) {
+    table[i] = encode(i >= 32768 ? i - 65536 : i);
+  }
+  return table;
+};
+
+let mulawTable = null;
+let alawTable = null;
+
+const encodeG711 = (int16Data, table) => {
+  const unsigned = new Uint16Array(int16Data.buffer, int16Data.byteOffset, int16Data.length);
+  const out = new Uint8Array(int16Data.length);
+  for (let i = 0; i < unsigned.length; i++) {
+    out[i] = table[unsigned[i]];
+  }
+  return out;
+};
+
+const ADPCM_INDEX = [-1, -1, -1, -1, 2, 4, 6, 8, -1, -1, -1, -1, 2, 4, 6, 8];
+const ADPCM_STEPS = [
+  7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+  50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+  253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+  1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+  3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+  11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+  32767,
+];
+const ADPCM_PREAMBLE_BYTES = 8;
+
+// IMA ADPCM with a per-frame preamble (predictor i16, step index u8, pad, count u32)
+// so every frame decodes on its own. Nibbles are packed low first.
+const encodeAdpcm = (int16Data) => {
+  const count = int16Data.length;
+  const out = new Uint8Array(ADPCM_PREAMBLE_BYTES + ((count + 1) >> 1));
+  const view = new DataView(out.buffer);
+  let predictor = count ? int16Data[0] : 0;
+  let index = 0;
+  view.setInt16(0, predictor, true);
+  view.setUint8(2, index);
+  view.setUint32(4, count, true);
+
+  for (let n = 0; n < count; n++) {
+    const step = ADPCM_STEPS[index];
+    let diff = int16Data[n] - predictor;
+    let code = 0;
+    if (diff < 0) {
+      code = 8;
+      diff = -diff;
+    }
+    let vpdiff = step >> 3;
+    if (diff >= step) {
+      code |= 4;
+      diff -= step;
+      vpdiff += step;
+    }
+    if (diff >= step >> 1) {
+      code |= 2;
+      diff -= step >> 1;
+      vpdiff += step >> 1;
+    }
+    if (diff >= step >> 2) {
+      code |= 1;
+      vpdiff += step >> 2;
+    }
+    predictor += code & 8 ? -vpdiff : vpdiff;
+    predictor = Math.max(-32768, Math.min(32767, predictor));
+    index = Math.max(0, Math.min(88, index + ADPCM_INDEX[code]));
+    out[ADPCM_PREAMBLE_BYTES + (n >> 1)] |= n & 1 ? code << 4 : code;
+  }
+  return out;
+};
+
+const encodePayload = (int16Data, codec) => {
+  switch (codec) {
+    case 'mulaw':
+      mulawTable = mulawTable || buildTable(linearToMulaw);
+      return encodeG711(int16Data, mulawTable);
+    case 'alaw':
+      alawTable = alawTable || buildTable(linearToAlaw);
+      return encodeG711(int16Data, alawTable);
+    case 'adpcm':
+      return encodeAdpcm(int16Data);
+    default:
+      return new Uint8Array(int16Data.buffer, int16Data.byteOffset, int16Data.byteLength);
+  }
+};
+
+export function encodeFrame(int16Data, codec, seq, timestampMs) {
+  const payload = encodePayload(int16Data, codec);
+  const frame = new Uint8Array(HEADER_BYTES + payload.length);
+  const view = new DataView(frame.buffer);
+  view.setUint8(0, FRAME_VERSION);
+  view.setUint8(1, CODECS[codec]);
+  view.setUint16(2, 0, true);
+  view.setUint32(4, seq >>> 0, true);
+  view.setBigUint64(8, BigInt(timestampMs), true);
+  frame.set(payload, HEADER_BYTES);
+  return frame.buffer;
+}
@@ -1,4 +1,6 @@
 // frontend/src/audioStreamer.js
+import { encodeFrame, SUPPORTED_CODECS } from './audioCodec';
+
 export default class AudioStreamer {
   constructor(wsUrl, onMessage) {
     this.wsUrl = wsUrl;
@@ -19,14 +21,43 @@ export default class AudioStreamer {
     this.processInterval = 500;  // Process every 0.5 seconds for more responsive detection
     this.lastProcessTime = 0;
     this.silenceThreshold = 0.008;  // Dynamic silence threshold
+    this.codecPreference = SUPPORTED_CODECS;  // Offered to the server, most compact first
+    this.codec = null;  // Set by the server's codec reply, or 'raw' for an older backend
+    this.helloText = null;
+    this.seq = 0;  // Frame sequence number
   }
 
   async start() {
     this.ws = new WebSocket(this.wsUrl);
     this.ws.binaryType = "arraybuffer";
-    this.ws.onopen = () => console.log("WS open");
+    this.codec = null;
+    this.seq = 0;
+    this.ws.onopen = () => {
+      console.log("WS open");
+      // Negotiate the wire codec before any audio is sent
+      this.helloText = JSON.stringify({
+        type: "hello",
+        codecs: this.codecPreference,
+        sampleRate: this.sampleRate
+      });
+      this.ws.send(this.helloText);
+    };
     this.ws.onmessage = (evt) => {
       const data = JSON.parse(evt.data);
+      if (data.type === "codec") {
+        this.codec = data.codec;
+        console.log("Negotiated audio codec:", this.codec);
+        return;
+      }
+      // An older backend classifies the hello as text instead of answering it;
+      // that echo means it only understands unframed PCM16
+      if (data.text !== undefined && data.text === this.helloText) {
+        if (!this.codec) {
+          console.log("Backend does not negotiate codecs, sending raw PCM");
+          this.codec = 'raw';
+        }
+        return;
+      }
       if (this.onMessage) this.onMessage(data);
     };
 
@@ -126,7 +157,8 @@ export default class AudioStreamer {
 
     // Send when we have enough data and enough time has passed
     const currentTime = Date.now();
-    if (this.audioBuffer.length >= this.sampleRate * 3 && // Wait for 3 seconds of data
+    if (this.codec &&  // Keep buffering until the wire format is known
+        this.audioBuffer.length >= this.sampleRate * 3 && // Wait for 3 seconds of data
         !this.isProcessing && 
         currentTime - this.lastProcessTime >= this.processInterval) {
       this.isProcessing = true;
@@ -150,8 +182,13 @@ export default class AudioStreamer {
         const hasAudio = dataToSend.some(sample => Math.abs(sample) > this.silenceThreshold * 0x7FFF);
         
         if (hasAudio && this.ws && this.ws.readyState === WebSocket.OPEN) {
-          const buffer = new Int16Array(dataToSend).buffer;
-          this.ws.send(buffer);
+          const int16Data = new Int16Array(dataToSend);
+          if (this.codec === 'raw') {
+            this.ws.send(int16Data.buffer);
+          } else {
+            this.ws.send(encodeFrame(int16Data, this.codec, this.seq, currentTime));
+            this.seq = (this.seq + 1) >>> 0;
+          }
           this.lastProcessTime = currentTime;
         }
       } catch (error) {
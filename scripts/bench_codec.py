@@ -0,0 +1,46 @@
+# scripts/bench_codec.py
+"""
+Decode throughput benchmark for the /ws/stream wire codecs.
+
+Usage: python scripts/bench_codec.py [seconds_per_frame] [frames]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from app.audio_codec import CODEC_IDS, SAMPLE_RATE, decode_frame, encode_frame
+
+def synthetic_speech(seconds, samplerate=SAMPLE_RATE, seed=0):
+    """Voice-like test signal: a few modulated harmonics plus noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 540, 720), 1))
+    signal = envelope * voice * 8000 + rng.normal(0, 500, t.size)
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+def bench(seconds_per_frame=5.0, frames=20):
+    samples = synthetic_speech(seconds_per_frame)
+    audio_seconds = seconds_per_frame * frames
+    print(f"{frames} frames x {seconds_per_frame}s of {SAMPLE_RATE} Hz audio")
+    print(f"{'codec':<8}{'kbit/s':>10}{'decode ms/frame':>18}{'x realtime':>14}{'SNR dB':>10}")
+    for name, codec in CODEC_IDS.items():
+        frame = encode_frame(samples, codec, 0, 0)
+        decoded = decode_frame(frame).samples  # Warm-up and quality check
+        start = time.perf_counter()
+        for _ in range(frames):
+            decode_frame(frame)
+        elapsed = time.perf_counter() - start
+
+        kbps = len(frame) * 8 / seconds_per_frame / 1000
+        noise = np.sum((samples.astype(np.float64) - decoded) ** 2)
+        snr = 10 * np.log10(np.sum(samples.astype(np.float64) ** 2) / noise) if noise else float("inf")
+        print(f"{name:<8}{kbps:>10.1f}{elapsed / frames * 1000:>18.3f}{audio_seconds / elapsed:>14.0f}{snr:>10.1f}")
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bench(seconds, count)